@@ -159,6 +159,15 @@ def _convert_args(signature: str, args: Tuple[Any, ...]) -> List[Any]:
         ) from e
 
 
+@functools.lru_cache
+def _compile_method_code(code: str) -> types.CodeType:
+    """Compile the code string of a mock method
+
+    This gets cached, as mock methods usually get called many times.
+    """
+    return compile(code, "<string>", "exec")
+
+
 def loggedmethod(self, func):
     """Decorator for a method to end in the call log"""
 
@@ -701,6 +710,21 @@ class DBusMockObject(dbus.service.Object):  # pylint: disable=too-many-instance-
         """
         self._emit_signal(interface, name, signature, sigargs, details)
 
+    @dbus.service.method(MOCK_IFACE, in_signature="a(sssav)", out_signature="")
+    def EmitSignals(self, signals: List[Tuple[str, str, str, Tuple[Any, ...]]]) -> None:
+        """Emit several signals from the object
+
+        :param signals: list of 4-tuples (interface, name, signature, args) describing
+                        one signal each. See EmitSignal() for details of the tuple values.
+
+        The signals are emitted in order. If an entry is invalid (e.g. its arguments
+        do not match its signature), this raises an InvalidArgs error; the signals
+        before that entry have already been emitted and logged, the following ones
+        are not emitted.
+        """
+        for signal in signals:
+            self.EmitSignal(*signal)
+
     @dbus.service.method(MOCK_IFACE, in_signature="", out_signature="a(tsav)")
     def GetCalls(self) -> List[CallLogType]:
         """List all the logged calls since the last call to ClearCalls().
@@ -771,7 +795,7 @@ class DBusMockObject(dbus.service.Object):  # pylint: disable=too-many-instance-
                 return code(self, *args)
             if code:
                 loc = locals().copy()
-                exec(code, globals(), loc)  # pylint: disable=exec-used
+                exec(_compile_method_code(code), globals(), loc)  # pylint: disable=exec-used
                 if "ret" in loc:
                     return loc["ret"]
         except Exception as e:
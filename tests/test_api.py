@@ -12,12 +12,11 @@ __copyright__ = """
 
 import importlib.util
 import os
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
-import time
-import tracemalloc
 import unittest
 from pathlib import Path
 
@@ -27,11 +26,75 @@ from gi.repository import GLib
 
 import dbusmock
 
-tracemalloc.start(25)
 dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
 
-# "a <heart> b" in py2/3 compatible unicode
-UNICODE = b"a\xe2\x99\xa5b".decode("UTF-8")
+# "a <heart> b"
+UNICODE = "a\u2665b"
+
+# properties of the /obj1 test object
+OBJ1_PROPS = {
+    "state": dbus.String("online"),
+    "cute": dbus.Boolean(True),
+}
+
+# (signature, arguments, expected error message parts) for calls with wrong arguments
+TYPE_MISMATCHES = [
+    # not enough arguments
+    ("i", [], ["More items found"]),
+    ("is", [1], ["More items found"]),
+    # too many arguments
+    ("", [1], ["Fewer items found"]),
+    ("i", [1, "hello"], ["Fewer items found"]),
+    # type mismatch
+    ("u", [-1], ["convert negative value to unsigned"]),
+    ("i", ["hello"], ["dbus.String", "integer"]),
+    ("s", [1], ["Expected a string"]),
+]
+
+# expected mock log output, compiled once for all tests
+LOG_DO = re.compile(rb"^[0-9.]+ Do$")
+LOG_DO_HELLO = re.compile(rb'^[0-9.]+ Do "Hello"$')
+LOG_DO_FOO_3 = re.compile(rb'^[0-9.]+ Do "foo" 3$')
+LOG_DO_ARRAY = re.compile(rb'^[0-9.]+ Do -1 \["/foo"\] 5 "a\xe2\x99\xa5b"$')
+LOG_DO_DICT = re.compile(rb'^[0-9.]+ Do -1 {"foo": 42} 5$')
+LOG_DO_RAISED = re.compile(rb"\n[0-9.]+ Do raised: com.example.Error.NoGood:.*\n")
+LOG_OTHER_DO = re.compile(rb"^[0-9.]+ OtherDo\n[0-9.]+ OtherDo2\n[0-9.]+ OtherDo3 42$")
+LOG_DO_SAME_NAME = re.compile(rb"^[0-9.]+ Do 10\n[0-9.]+ Do 11$")
+LOG_PROPERTIES = [
+    re.compile(rb"\n[0-9.]+ Get / org.freedesktop.Test.Main.version\n"),
+    re.compile(rb"\n[0-9.]+ Get / org.freedesktop.Test.Main.connected\n"),
+    re.compile(rb"\n[0-9.]+ GetAll / org.freedesktop.Test.Main\n"),
+    re.compile(rb"\n[0-9.]+ Set / org.freedesktop.Test.Main.version 4\n"),
+]
+LOG_SIGNALS = [
+    re.compile(rb"[0-9.]+ emit / org.freedesktop.Test.Main.SigNoArgs\n"),
+    re.compile(rb'[0-9.]+ emit / org.freedesktop.Test.Sub.SigTwoArgs "hello" 42\n'),
+    re.compile(rb"[0-9.]+ emit / org.freedesktop.Test.Sub.SigTypeTest -42 42"),
+    re.compile(rb'[0-9.]+ emit / org.freedesktop.Test.Sub.SigTypeTest -42 42 "hello" \["/a", "/b"\]\n'),
+    re.compile(rb'[0-9.]+ emit / org.freedesktop.Test.Main.SigDetailed "details" 123\n'),
+    re.compile(rb'[0-9.]+ emit /obj1 org.freedesktop.Test.Main.SigDetailedWithPath "details" 456\n'),
+]
+LOG_SIGNAL_FIRST = re.compile(rb'[0-9.]+ emit / org.freedesktop.Test.Main.SigFirst "hello"\n')
+
+
+def run_loop_with_timeout(loop, timeout_ms):
+    """Run loop until something quits it, but for at most timeout_ms
+
+    Return whether the timeout fired.
+    """
+    timed_out = False
+
+    def on_timeout():
+        nonlocal timed_out
+
+        timed_out = True
+        loop.quit()
+
+    timeout_id = GLib.timeout_add(timeout_ms, on_timeout)
+    loop.run()
+    if not timed_out:
+        GLib.source_remove(timeout_id)
+    return timed_out
 
 
 class TestAPI(dbusmock.DBusTestCase):
@@ -42,26 +105,47 @@ class TestAPI(dbusmock.DBusTestCase):
         cls.start_session_bus()
         cls.dbus_con = cls.get_dbus()
 
-    def setUp(self):
+        # one mock server for the whole class; setUp() resets it between tests
         # pylint: disable=consider-using-with
-        self.mock_log = tempfile.NamedTemporaryFile()  # noqa: SIM115
-        self.p_mock = self.spawn_server(
-            "org.freedesktop.Test", "/", "org.freedesktop.Test.Main", stdout=self.mock_log
-        )
+        cls.mock_log = tempfile.TemporaryFile()  # noqa: SIM115
+        cls.p_mock = cls.spawn_server("org.freedesktop.Test", "/", "org.freedesktop.Test.Main", stdout=cls.mock_log)
 
-        self.obj_test = self.dbus_con.get_object("org.freedesktop.Test", "/")
-        self.dbus_test = dbus.Interface(self.obj_test, "org.freedesktop.Test.Main")
-        self.dbus_mock = dbus.Interface(self.obj_test, dbusmock.MOCK_IFACE)
-        self.dbus_props = dbus.Interface(self.obj_test, dbus.PROPERTIES_IFACE)
+        cls.obj_test = cls.dbus_con.get_object("org.freedesktop.Test", "/")
+        cls.dbus_test = dbus.Interface(cls.obj_test, "org.freedesktop.Test.Main")
+        cls.dbus_mock = dbus.Interface(cls.obj_test, dbusmock.MOCK_IFACE)
+        cls.dbus_props = dbus.Interface(cls.obj_test, dbus.PROPERTIES_IFACE)
+        cls.dbus_introspect = dbus.Interface(cls.obj_test, dbus.INTROSPECTABLE_IFACE)
+        cls.obj_proxies = {}
 
-    def assertLog(self, regex):
-        self.assertRegex(Path(self.mock_log.name).read_bytes(), regex)
+    @classmethod
+    def tearDownClass(cls):
+        cls.p_mock.terminate()
+        cls.p_mock.wait()
+        cls.mock_log.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.dbus_mock.Reset()
+        self.dbus_mock.ClearCalls()
+        # the mock shares our file offset, so this makes it log from the start again
+        self.mock_log.seek(0)
+        self.mock_log.truncate()
+
+    def get_test_object(self, path):
+        """Return a proxy for a mock object path, reused across tests
 
-    def tearDown(self):
-        if self.p_mock.stdout:
-            self.p_mock.stdout.close()
-        self.p_mock.terminate()
-        self.p_mock.wait()
+        This does not introspect, as the object's methods change with every Reset().
+        """
+        if path not in self.obj_proxies:
+            self.obj_proxies[path] = self.dbus_con.get_object("org.freedesktop.Test", path, introspect=False)
+        return self.obj_proxies[path]
+
+    def read_log(self):
+        fd = self.mock_log.fileno()
+        return os.pread(fd, os.fstat(fd).st_size, 0)
+
+    def assertLog(self, regex):
+        self.assertRegex(self.read_log(), regex)
 
     def test_noarg_noret(self):
         """no arguments, no return value"""
@@ -70,7 +154,7 @@ class TestAPI(dbusmock.DBusTestCase):
         self.assertEqual(self.dbus_test.Do(), None)
 
         # check that it's logged correctly
-        self.assertLog(b"^[0-9.]+ Do$")
+        self.assertLog(LOG_DO)
 
     def test_onearg_noret(self):
         """one argument, no return value"""
@@ -79,7 +163,7 @@ class TestAPI(dbusmock.DBusTestCase):
         self.assertEqual(self.dbus_test.Do("Hello"), None)
 
         # check that it's logged correctly
-        self.assertLog(b'^[0-9.]+ Do "Hello"$')
+        self.assertLog(LOG_DO_HELLO)
 
     def test_onearg_ret(self):
         """one argument, code for return value"""
@@ -100,7 +184,7 @@ class TestAPI(dbusmock.DBusTestCase):
         self.assertEqual(self.dbus_test.Do("foo", 3), "foofoofoo")
 
         # check that it's logged correctly
-        self.assertLog(b'^[0-9.]+ Do "foo" 3$')
+        self.assertLog(LOG_DO_FOO_3)
 
     def test_array_arg(self):
         """array argument"""
@@ -122,7 +206,7 @@ assert args[3] == {UNICODE!r}
         self.assertEqual(self.dbus_test.Do(-1, ["/foo"], 5, UNICODE), None)
 
         # check that it's logged correctly
-        self.assertLog(b'^[0-9.]+ Do -1 \\["/foo"\\] 5 "a\\xe2\\x99\\xa5b"$')
+        self.assertLog(LOG_DO_ARRAY)
 
     def test_dict_arg(self):
         """dictionary argument"""
@@ -142,7 +226,7 @@ assert args[2] == 5
         self.assertEqual(self.dbus_test.Do(-1, {"foo": 42}, 5), None)
 
         # check that it's logged correctly
-        self.assertLog(b'^[0-9.]+ Do -1 {"foo": 42} 5$')
+        self.assertLog(LOG_DO_DICT)
 
     def test_multi_output(self):
         """multiple output values"""
@@ -160,14 +244,14 @@ assert args[2] == 5
             self.dbus_test.Do()
         self.assertEqual(cm.exception.get_dbus_name(), "com.example.Error.NoGood")
         self.assertEqual(cm.exception.get_dbus_message(), "no good")
-        self.assertLog(b"\n[0-9.]+ Do raised: com.example.Error.NoGood:.*\n")
+        self.assertLog(LOG_DO_RAISED)
 
     def test_methods_on_other_interfaces(self):
         """methods on other interfaces"""
 
-        self.dbus_mock.AddMethod("org.freedesktop.Test.Other", "OtherDo", "", "", "")
         self.dbus_mock.AddMethods(
-            "org.freedesktop.Test.Other", [("OtherDo2", "", "", ""), ("OtherDo3", "i", "i", "ret = args[0]")]
+            "org.freedesktop.Test.Other",
+            [("OtherDo", "", "", ""), ("OtherDo2", "", "", ""), ("OtherDo3", "i", "i", "ret = args[0]")],
         )
 
         # should not be on the main interface
@@ -179,7 +263,7 @@ assert args[2] == 5
         self.assertEqual(self.obj_test.OtherDo3(42, dbus_interface="org.freedesktop.Test.Other"), 42)
 
         # check that it's logged correctly
-        self.assertLog(b"^[0-9.]+ OtherDo\n[0-9.]+ OtherDo2\n[0-9.]+ OtherDo3 42$")
+        self.assertLog(LOG_OTHER_DO)
 
     def test_methods_same_name(self):
         """methods with same name on different interfaces"""
@@ -195,7 +279,7 @@ assert args[2] == 5
         self.assertEqual(self.obj_test.Do(11, dbus_interface="org.iface2"), 14)
 
         # check that it's logged correctly
-        self.assertLog(b"^[0-9.]+ Do 10\n[0-9.]+ Do 11$")
+        self.assertLog(LOG_DO_SAME_NAME)
 
         # now add it to the primary interface, too
         self.dbus_mock.AddMethod("", "Do", "i", "i", "ret = args[0] + 1")
@@ -206,43 +290,25 @@ assert args[2] == 5
     def test_methods_type_mismatch(self):
         """calling methods with wrong arguments"""
 
-        def check(signature, args, err):
-            self.dbus_mock.AddMethod("", "Do", signature, "", "")
-            try:
-                self.dbus_test.Do(*args)
-                self.fail(f'method call did not raise an error for signature "{signature}" and arguments {args}')
-            except dbus.exceptions.DBusException as e:
-                self.assertEqual(e.get_dbus_name(), "org.freedesktop.DBus.Error.InvalidArgs")
-                self.assertIn(err, str(e))
-
-        # not enough arguments
-        check("i", [], "More items found")
-        check("is", [1], "More items found")
-
-        # too many arguments
-        check("", [1], "Fewer items found")
-        check("i", [1, "hello"], "Fewer items found")
-
-        # type mismatch
-        check("u", [-1], "convert negative value to unsigned")
-        check("i", ["hello"], "dbus.String")
-        check("i", ["hello"], "integer")
-        check("s", [1], "Expected a string")
+        # one method per signature, named after it
+        self.dbus_mock.AddMethods("", [(f"Do_{sig}", sig, "", "") for sig in {sig for sig, _, _ in TYPE_MISMATCHES}])
+
+        for signature, args, errs in TYPE_MISMATCHES:
+            with self.subTest(signature=signature, args=args):
+                try:
+                    getattr(self.dbus_test, f"Do_{signature}")(*args)
+                    self.fail(f'method call did not raise an error for signature "{signature}" and arguments {args}')
+                except dbus.exceptions.DBusException as e:
+                    self.assertEqual(e.get_dbus_name(), "org.freedesktop.DBus.Error.InvalidArgs")
+                    for err in errs:
+                        self.assertIn(err, str(e))
 
     def test_add_object(self):
         """add a new object"""
 
-        self.dbus_mock.AddObject(
-            "/obj1",
-            "org.freedesktop.Test.Sub",
-            {
-                "state": dbus.String("online"),
-                "cute": dbus.Boolean(True),
-            },
-            [],
-        )
+        self.dbus_mock.AddObject("/obj1", "org.freedesktop.Test.Sub", OBJ1_PROPS, [])
 
-        obj1 = self.dbus_con.get_object("org.freedesktop.Test", "/obj1")
+        obj1 = self.get_test_object("/obj1")
         dbus_sub = dbus.Interface(obj1, "org.freedesktop.Test.Sub")
         dbus_props = dbus.Interface(obj1, dbus.PROPERTIES_IFACE)
 
@@ -275,17 +341,14 @@ assert args[2] == 5
         self.dbus_mock.AddObject(
             "/obj1",
             "org.freedesktop.Test.Sub",
-            {
-                "state": dbus.String("online"),
-                "cute": dbus.Boolean(True),
-            },
+            OBJ1_PROPS,
             [
                 ("Do0", "", "i", "ret = 42"),
                 ("Do1", "i", "i", "ret = 31337"),
             ],
         )
 
-        obj1 = self.dbus_con.get_object("org.freedesktop.Test", "/obj1")
+        obj1 = self.get_test_object("/obj1")
 
         self.assertEqual(obj1.Do0(), 42)
         self.assertEqual(obj1.Do1(1), 31337)
@@ -311,9 +374,8 @@ assert args[2] == 5
             dbus.Int32(2),
         )
 
-        self.dbus_mock.AddProperty("org.freedesktop.Test.Main", "version", dbus.Int32(2))
-        # once again on default interface
-        self.dbus_mock.AddProperty("", "connected", dbus.Boolean(True))
+        # add several at once, on the default interface
+        self.dbus_mock.AddProperties("", {"version": dbus.Int32(2), "connected": dbus.Boolean(True)})
 
         self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "version"), 2)
         self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "connected"), True)
@@ -330,11 +392,9 @@ assert args[2] == 5
         self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "version"), 4)
 
         # check that the Get/Set calls get logged
-        log = Path(self.mock_log.name).read_text("UTF-8")
-        self.assertRegex(log, "\n[0-9.]+ Get / org.freedesktop.Test.Main.version\n")
-        self.assertRegex(log, "\n[0-9.]+ Get / org.freedesktop.Test.Main.connected\n")
-        self.assertRegex(log, "\n[0-9.]+ GetAll / org.freedesktop.Test.Main\n")
-        self.assertRegex(log, "\n[0-9.]+ Set / org.freedesktop.Test.Main.version 4\n")
+        log = self.read_log()
+        for regex in LOG_PROPERTIES:
+            self.assertRegex(log, regex)
 
         # add property to different interface
         self.dbus_mock.AddProperty("org.freedesktop.Test.Other", "color", dbus.String("yellow"))
@@ -343,13 +403,14 @@ assert args[2] == 5
         self.assertEqual(self.dbus_props.GetAll("org.freedesktop.Test.Other"), {"color": "yellow"})
         self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Other", "color"), "yellow")
 
+        # test adding properties with the array type
+        self.dbus_mock.AddProperty("org.freedesktop.Test.Main", "array", dbus.Array(["first"], signature="s"))
+        self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "array"), ["first"])
+
         changed_props = []
         ml = GLib.MainLoop()
 
         def catch(*args, **kwargs):
-            if kwargs["interface"] != "org.freedesktop.DBus.Properties":
-                return
-
             self.assertEqual(kwargs["interface"], "org.freedesktop.DBus.Properties")
             self.assertEqual(kwargs["member"], "PropertiesChanged")
 
@@ -357,52 +418,47 @@ assert args[2] == 5
             self.assertEqual(iface, "org.freedesktop.Test.Main")
 
             changed_props.append(changed)
+            GLib.source_remove(timeout_id)
             ml.quit()
 
         match = self.dbus_con.add_signal_receiver(
-            catch, interface_keyword="interface", path_keyword="path", member_keyword="member"
+            catch,
+            signal_name="PropertiesChanged",
+            dbus_interface=dbus.PROPERTIES_IFACE,
+            path="/",
+            interface_keyword="interface",
+            path_keyword="path",
+            member_keyword="member",
         )
 
-        # change property using mock helper
+        # change properties using mock helper, including one with the array type
         self.dbus_mock.UpdateProperties(
             "org.freedesktop.Test.Main",
             {
                 "version": 5,
                 "connected": False,
+                "array": dbus.Array(["second", "third"], signature="s"),
             },
         )
 
-        GLib.timeout_add(3000, ml.quit)
+        timeout_id = GLib.timeout_add(3000, ml.quit)
         ml.run()
 
         match.remove()
 
-        self.assertEqual(self.dbus_props.GetAll("org.freedesktop.Test.Main"), {"version": 5, "connected": False})
-        self.assertEqual(changed_props, [{"version": 5, "connected": False}])
-
-        # test adding properties with the array type
-        self.dbus_mock.AddProperty("org.freedesktop.Test.Main", "array", dbus.Array(["first"], signature="s"))
-        self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "array"), ["first"])
-
-        # test updating properties with the array type
-        self.dbus_mock.UpdateProperties(
-            "org.freedesktop.Test.Main", {"array": dbus.Array(["second", "third"], signature="s")}
-        )
+        expected = {"version": 5, "connected": False, "array": ["second", "third"]}
+        self.assertEqual(self.dbus_props.GetAll("org.freedesktop.Test.Main"), expected)
+        self.assertEqual(changed_props, [expected])
         self.assertEqual(self.dbus_props.Get("org.freedesktop.Test.Main", "array"), ["second", "third"])
 
     def test_introspection_methods(self):
         """dynamically added methods appear in introspection"""
 
-        dbus_introspect = dbus.Interface(self.obj_test, dbus.INTROSPECTABLE_IFACE)
-
-        xml_empty = dbus_introspect.Introspect()
-        self.assertIn('<interface name="org.freedesktop.DBus.Mock">', xml_empty)
-        self.assertIn('<method name="AddMethod">', xml_empty)
-
         self.dbus_mock.AddMethod("", "Do", "saiv", "i", "ret = 42")
 
-        xml_method = dbus_introspect.Introspect()
-        self.assertNotEqual(xml_empty, xml_method)
+        xml_method = self.dbus_introspect.Introspect()
+        self.assertIn('<interface name="org.freedesktop.DBus.Mock">', xml_method)
+        self.assertIn('<method name="AddMethod">', xml_method)
         self.assertIn('<interface name="org.freedesktop.Test.Main">', xml_method)
         # various Python versions use different name vs. type ordering
         expected1 = """<method name="Do">
@@ -426,7 +482,7 @@ assert args[2] == 5
         self.dbus_mock.AddProperty("", "Color", "yellow")
         self.dbus_mock.AddProperty("org.freedesktop.Test.Sub", "Count", 5)
 
-        xml = self.obj_test.Introspect()
+        xml = self.dbus_introspect.Introspect()
 
         self.assertIn('<interface name="org.freedesktop.Test.Main">', xml)
         self.assertIn('<interface name="org.freedesktop.Test.Sub">', xml)
@@ -449,46 +505,58 @@ assert args[2] == 5
         self.assertEqual(self.dbus_test.EnumObjs(), ["/"])
 
         self.dbus_mock.AddObject("/obj1", "org.freedesktop.Test.Sub", {}, [])
-        self.assertEqual(set(self.dbus_test.EnumObjs()), {"/", "/obj1"})
+        self.assertCountEqual(self.dbus_test.EnumObjs(), ["/", "/obj1"])
 
     def test_signals(self):
         """emitting signals"""
 
         self.dbus_mock.AddObject("/obj1", "org.freedesktop.Test.Sub", {}, [])
 
-        def do_emit():
-            self.dbus_mock.EmitSignal("", "SigNoArgs", "", [])
-            self.dbus_mock.EmitSignal("org.freedesktop.Test.Sub", "SigTwoArgs", "su", ["hello", 42])
-            self.dbus_mock.EmitSignal(
-                "org.freedesktop.Test.Sub",
-                "SigTypeTest",
-                "iuvao",
-                [-42, 42, dbus.String("hello", variant_level=1), ["/a", "/b"]],
-            )
-            self.dbus_mock.EmitSignalDetailed(
-                "", "SigDetailed", "su", ["details", 123], {"destination": self.dbus_con.get_unique_name()}
-            )
-            self.dbus_mock.EmitSignalDetailed("", "SigDetailedWithPath", "su", ["details", 456], {"path": "/obj1"})
-
         caught = []
-        ml = GLib.MainLoop()
 
         def catch(*args, **kwargs):
-            if kwargs["interface"].startswith("org.freedesktop.Test"):
-                caught.append((args, kwargs))
-            if len(caught) == 5:
-                # we caught everything there is to catch, don't wait for the
-                # timeout
-                ml.quit()
-
-        self.dbus_con.add_signal_receiver(
-            catch, interface_keyword="interface", path_keyword="path", member_keyword="member"
+            caught.append((args, kwargs))
+
+        # let the bus only send us the signals of our test interfaces
+        for iface in ("org.freedesktop.Test.Main", "org.freedesktop.Test.Sub"):
+            match = self.dbus_con.add_signal_receiver(
+                catch,
+                dbus_interface=iface,
+                interface_keyword="interface",
+                path_keyword="path",
+                member_keyword="member",
+            )
+            self.addCleanup(match.remove)
+
+        self.dbus_mock.EmitSignals(
+            [
+                ("", "SigNoArgs", "", []),
+                ("org.freedesktop.Test.Sub", "SigTwoArgs", "su", ["hello", 42]),
+                (
+                    "org.freedesktop.Test.Sub",
+                    "SigTypeTest",
+                    "iuvao",
+                    [-42, 42, dbus.String("hello", variant_level=1), ["/a", "/b"]],
+                ),
+            ]
+        )
+        self.dbus_mock.EmitSignalDetailed(
+            "", "SigDetailed", "su", ["details", 123], {"destination": self.dbus_con.get_unique_name()}
         )
+        self.dbus_mock.EmitSignalDetailed("", "SigDetailedWithPath", "su", ["details", 456], {"path": "/obj1"})
 
-        GLib.timeout_add(200, do_emit)
-        # ensure that the loop quits even when we catch fewer than 2 signals
-        GLib.timeout_add(3000, ml.quit)
-        ml.run()
+        def on_timeout():
+            nonlocal timeout_id
+
+            timeout_id = 0
+
+        # dispatch the signals until we caught all of them, but give up after 3 s
+        timeout_id = GLib.timeout_add(3000, on_timeout)
+        ctx = GLib.MainContext.default()
+        while len(caught) < 5 and timeout_id:
+            ctx.iteration(True)
+        if timeout_id:
+            GLib.source_remove(timeout_id)
 
         # check SigNoArgs
         self.assertEqual(caught[0][0], ())
@@ -536,38 +604,69 @@ assert args[2] == 5
         self.assertEqual(caught[4][1]["interface"], "org.freedesktop.Test.Main")
 
         # check correct logging
-        log = Path(self.mock_log.name).read_text("UTF-8")
-        self.assertRegex(log, "[0-9.]+ emit / org.freedesktop.Test.Main.SigNoArgs\n")
-        self.assertRegex(log, '[0-9.]+ emit / org.freedesktop.Test.Sub.SigTwoArgs "hello" 42\n')
-        self.assertRegex(log, "[0-9.]+ emit / org.freedesktop.Test.Sub.SigTypeTest -42 42")
-        self.assertRegex(log, r'[0-9.]+ emit / org.freedesktop.Test.Sub.SigTypeTest -42 42 "hello" \["/a", "/b"\]\n')
-        self.assertRegex(log, '[0-9.]+ emit / org.freedesktop.Test.Main.SigDetailed "details" 123\n')
-        self.assertRegex(log, '[0-9.]+ emit /obj1 org.freedesktop.Test.Main.SigDetailedWithPath "details" 456\n')
+        log = self.read_log()
+        for regex in LOG_SIGNALS:
+            self.assertRegex(log, regex)
 
     def test_signals_type_mismatch(self):
         """emitting signals with wrong arguments"""
 
-        def check(signature, args, err):
-            try:
-                self.dbus_mock.EmitSignal("", "s", signature, args)
-                self.fail(f'EmitSignal did not raise an error for signature "{signature}" and arguments {args}')
-            except dbus.exceptions.DBusException as e:
-                self.assertEqual(e.get_dbus_name(), "org.freedesktop.DBus.Error.InvalidArgs")
-                self.assertIn(err, str(e))
+        for signature, args, errs in TYPE_MISMATCHES:
+            with self.subTest(signature=signature, args=args):
+                try:
+                    self.dbus_mock.EmitSignal("", "s", signature, args)
+                    self.fail(f'EmitSignal did not raise an error for signature "{signature}" and arguments {args}')
+                except dbus.exceptions.DBusException as e:
+                    self.assertEqual(e.get_dbus_name(), "org.freedesktop.DBus.Error.InvalidArgs")
+                    for err in errs:
+                        self.assertIn(err, str(e))
+
+    def test_signals_partial(self):
+        """emitting several signals with an invalid entry"""
+
+        caught = []
+
+        def catch(*args, **kwargs):
+            caught.append((args, kwargs))
+
+        match = self.dbus_con.add_signal_receiver(
+            catch, dbus_interface="org.freedesktop.Test.Main", member_keyword="member"
+        )
+        self.addCleanup(match.remove)
+
+        with self.assertRaises(dbus.exceptions.DBusException) as cm:
+            self.dbus_mock.EmitSignals(
+                [
+                    ("", "SigFirst", "s", ["hello"]),
+                    ("", "SigBad", "i", ["hello"]),
+                    ("", "SigLast", "", []),
+                ]
+            )
+        self.assertEqual(cm.exception.get_dbus_name(), "org.freedesktop.DBus.Error.InvalidArgs")
+
+        # signals arrive in order, so once we got this one we saw all emitted ones
+        self.dbus_mock.EmitSignal("", "SigDone", "", [])
+
+        def on_timeout():
+            nonlocal timeout_id
+
+            timeout_id = 0
 
-        # not enough arguments
-        check("i", [], "More items found")
-        check("is", [1], "More items found")
+        timeout_id = GLib.timeout_add(3000, on_timeout)
+        ctx = GLib.MainContext.default()
+        while len(caught) < 2 and timeout_id:
+            ctx.iteration(True)
+        if timeout_id:
+            GLib.source_remove(timeout_id)
 
-        # too many arguments
-        check("", [1], "Fewer items found")
-        check("i", [1, "hello"], "Fewer items found")
+        # the entry before the invalid one was emitted, the ones after it were not
+        self.assertEqual([kwargs["member"] for _, kwargs in caught], ["SigFirst", "SigDone"])
+        self.assertEqual(caught[0][0], ("hello",))
 
-        # type mismatch
-        check("u", [-1], "convert negative value to unsigned")
-        check("i", ["hello"], "dbus.String")
-        check("i", ["hello"], "integer")
-        check("s", [1], "Expected a string")
+        log = self.read_log()
+        self.assertRegex(log, LOG_SIGNAL_FIRST)
+        self.assertNotIn(b"SigBad", log)
+        self.assertNotIn(b"SigLast", log)
 
     def test_dbus_get_log(self):
         """query call logs over D-Bus"""
@@ -575,7 +674,7 @@ assert args[2] == 5
         self.assertEqual(self.dbus_mock.ClearCalls(), None)
         self.assertEqual(self.dbus_mock.GetCalls(), dbus.Array([]))
 
-        self.dbus_mock.AddMethod("", "Do", "", "", "")
+        self.dbus_mock.AddMethods("", [("Do", "", "", ""), ("Wop", "s", "s", 'ret="hello"')])
         self.assertEqual(self.dbus_test.Do(), None)
         mock_log = self.dbus_mock.GetCalls()
         self.assertEqual(len(mock_log), 1)
@@ -583,10 +682,8 @@ assert args[2] == 5
         self.assertEqual(mock_log[0][1], "Do")
         self.assertEqual(mock_log[0][2], [])
 
+        # the log now only has the calls after clearing
         self.assertEqual(self.dbus_mock.ClearCalls(), None)
-        self.assertEqual(self.dbus_mock.GetCalls(), dbus.Array([]))
-
-        self.dbus_mock.AddMethod("", "Wop", "s", "s", 'ret="hello"')
         self.assertEqual(self.dbus_test.Wop("foo"), "hello")
         self.assertEqual(self.dbus_test.Wop("bar"), "hello")
         mock_log = self.dbus_mock.GetCalls()
@@ -597,17 +694,13 @@ assert args[2] == 5
         self.assertEqual(mock_log[1][1], "Wop")
         self.assertEqual(mock_log[1][2], ["bar"])
 
-        self.assertEqual(self.dbus_mock.ClearCalls(), None)
-        self.assertEqual(self.dbus_mock.GetCalls(), dbus.Array([]))
-
     def test_dbus_get_method_calls(self):
         """query method call logs over D-Bus"""
 
-        self.dbus_mock.AddMethod("", "Do", "", "", "")
+        self.dbus_mock.AddMethods("", [("Do", "", "", ""), ("Wop", "s", "s", 'ret="hello"')])
         self.assertEqual(self.dbus_test.Do(), None)
         self.assertEqual(self.dbus_test.Do(), None)
 
-        self.dbus_mock.AddMethod("", "Wop", "s", "s", 'ret="hello"')
         self.assertEqual(self.dbus_test.Wop("foo"), "hello")
         self.assertEqual(self.dbus_test.Wop("bar"), "hello")
 
@@ -634,11 +727,11 @@ assert args[2] == 5
             loop.quit()
 
         self.dbus_mock.AddMethod("", "Do", "s", "", "")
-        self.dbus_mock.connect_to_signal("MethodCalled", method_called)
+        match = self.dbus_mock.connect_to_signal("MethodCalled", method_called)
+        self.addCleanup(match.remove)
         self.assertEqual(self.dbus_test.Do("foo"), None)
 
-        GLib.timeout_add(5000, loop.quit)
-        loop.run()
+        self.assertFalse(run_loop_with_timeout(loop, 5000), "timed out waiting for MethodCalled signal")
 
         self.assertEqual(len(caught_signals), 1)
         method, args = caught_signals[0]
@@ -661,7 +754,7 @@ assert args[2] == 5
         # resets methods
         self.assertRaises(dbus.exceptions.DBusException, self.dbus_test.Do)
         # resets other objects
-        obj1 = self.dbus_con.get_object("org.freedesktop.Test", "/obj1")
+        obj1 = self.get_test_object("/obj1")
         self.assertRaises(dbus.exceptions.DBusException, obj1.GetAll, "")
 
     def test_version(self):
@@ -692,14 +785,12 @@ def load(mock, parameters):
 """
             )
             my_template.flush()
-            (p_mock, dbus_ultimate) = self.spawn_server_template(my_template.name, stdout=subprocess.PIPE)
+            (p_mock, dbus_ultimate) = self.spawn_server_template(my_template.name, stdout=subprocess.DEVNULL)
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
             # ensure that we don't use/write any .pyc files, they are dangerous
             # in a world-writable directory like /tmp
-            self.assertFalse(Path(my_template.name + "c").exists())
             self.assertFalse(Path(importlib.util.cache_from_source(my_template.name)).exists())
 
         loop = GLib.MainLoop()
@@ -730,8 +821,7 @@ def load(mock, parameters):
         self.assertEqual(mock_calls[1][1], ["bar"])
 
         # Check signals
-        GLib.timeout_add(5000, loop.quit)
-        loop.run()
+        self.assertFalse(run_loop_with_timeout(loop, 5000), "timed out waiting for MethodCalled signal")
 
         #  only one signal because we call loop.quit() in the handler
         self.assertEqual(len(caught_signals), 1)
@@ -760,10 +850,9 @@ def load(mock, parameters):
 """
             )
 
-            (p_mock, dbus_ultimate) = self.spawn_server_template("answer", stdout=subprocess.PIPE)
+            (p_mock, dbus_ultimate) = self.spawn_server_template("answer", stdout=subprocess.DEVNULL)
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
             xml = dbus_ultimate.Introspect()
             self.assertIn('<interface name="universe.Ultimate">', xml)
@@ -791,10 +880,9 @@ def Answer(self, string):
 """
             )
             my_template.flush()
-            (p_mock, dbus_ultimate) = self.spawn_server_template(my_template.name, stdout=subprocess.PIPE)
+            (p_mock, dbus_ultimate) = self.spawn_server_template(my_template.name, stdout=subprocess.DEVNULL)
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
         loop = GLib.MainLoop()
         caught_signals = []
@@ -820,8 +908,7 @@ def Answer(self, string):
         self.assertEqual(mock_calls[1][1], ["bar"])
 
         # Check signals
-        GLib.timeout_add(5000, loop.quit)
-        loop.run()
+        self.assertFalse(run_loop_with_timeout(loop, 5000), "timed out waiting for MethodCalled signal")
 
         #  only one signal because we call loop.quit() in the handler
         self.assertEqual(len(caught_signals), 1)
@@ -849,11 +936,10 @@ def load(mock, parameters):
             )
             my_template.flush()
             (p_mock, dbus_ultimate) = self.spawn_server_template(
-                my_template.name, stdout=subprocess.PIPE, system_bus=False
+                my_template.name, stdout=subprocess.DEVNULL, system_bus=False
             )
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
         self.wait_for_bus_object("universe.Ultimate", "/")
         self.assertEqual(dbus_ultimate.Answer(), 42)
@@ -875,11 +961,10 @@ def load(mock, parameters):
             )
             my_template.flush()
             (p_mock, dbus_ultimate) = self.spawn_server_template(
-                my_template.name, stdout=subprocess.PIPE, system_bus=False
+                my_template.name, stdout=subprocess.DEVNULL, system_bus=False
             )
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
         self.wait_for_bus_object("universe.Ultimate", "/")
         self.assertEqual(dbus_ultimate.Answer(), 42)
@@ -902,10 +987,9 @@ def load(mock, parameters):
 """
             )
             my_template.flush()
-            (p_mock, dbus_objmgr) = self.spawn_server_template(my_template.name, stdout=subprocess.PIPE)
+            (p_mock, dbus_objmgr) = self.spawn_server_template(my_template.name, stdout=subprocess.DEVNULL)
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
         # should have the two Things, but not the Peer
         self.assertEqual(
@@ -952,10 +1036,9 @@ def load(mock, parameters):
 """
             )
             my_template.flush()
-            (p_mock, _) = self.spawn_server_template(my_template.name, stdout=subprocess.PIPE, system_bus=False)
+            (p_mock, _) = self.spawn_server_template(my_template.name, stdout=subprocess.DEVNULL, system_bus=False)
             self.addCleanup(p_mock.wait)
             self.addCleanup(p_mock.terminate)
-            self.addCleanup(p_mock.stdout.close)
 
         dbus_con = self.get_dbus(system_bus=False)
         thing1 = dbus_con.get_object("org.test.Things", "/org/test/Things/Thing1")
@@ -965,10 +1048,9 @@ def load(mock, parameters):
     def test_reset(self):
         """Reset() puts the template back to pristine state"""
 
-        (p_mock, obj_logind) = self.spawn_server_template("logind", stdout=subprocess.PIPE)
+        (p_mock, obj_logind) = self.spawn_server_template("logind", stdout=subprocess.DEVNULL)
         self.addCleanup(p_mock.wait)
         self.addCleanup(p_mock.terminate)
-        self.addCleanup(p_mock.stdout.close)
 
         # do some property, method, and object changes
         obj_logind.Set("org.freedesktop.login1.Manager", "IdleAction", "frob")
@@ -1005,21 +1087,14 @@ class TestCleanup(dbusmock.DBusTestCase):
         self.stop_dbus(self.session_bus_pid)
 
         # give the mock 2 seconds to terminate
-        timeout = 20
-        while timeout > 0:
-            if p_mock.poll() is not None:
-                break
-            timeout -= 1
-            time.sleep(0.1)
-
-        if p_mock.poll() is None:
+        try:
+            self.assertEqual(p_mock.wait(timeout=2), 0)
+        except subprocess.TimeoutExpired:
             # clean up manually
             p_mock.terminate()
             p_mock.wait()
             self.fail("mock process did not terminate after 2 seconds")
 
-        self.assertEqual(p_mock.wait(), 0)
-
 
 class TestSubclass(dbusmock.DBusTestCase):
     """Test subclassing DBusMockObject"""
@@ -26,11 +26,21 @@ def test_dbusmock_test(dbusmock_session):
         assert obj_test.Upper("hello", interface=test_iface) == "HELLO"
 
 
-@pytest.fixture(name="upower_mock")
-def fixture_upower_mock(dbusmock_system):
+@pytest.fixture(scope="session", name="upower_mock_server")
+def fixture_upower_mock_server(dbusmock_system):
+    # this server stays alive for the whole test session, so it must be the only owner
+    # of org.freedesktop.UPower on the dbusmock_system bus; other tests must use upower_mock
+    # instead of spawning their own UPower mock
     assert dbusmock_system
     with dbusmock.SpawnedMock.spawn_with_template("upower") as server:
-        yield server.obj
+        yield server
+
+
+@pytest.fixture(name="upower_mock")
+def fixture_upower_mock(upower_mock_server):
+    # share the mock process between tests, but start each one with pristine template state
+    upower_mock_server.obj.Reset(dbus_interface=dbusmock.MOCK_IFACE)
+    return upower_mock_server.obj
 
 
 def test_dbusmock_test_template(upower_mock):
@@ -17,7 +17,6 @@ import shutil
 import subprocess
 import sys
 import time
-import tracemalloc
 import unittest
 import xml.etree.ElementTree as ET
 from pathlib import Path
@@ -29,7 +28,6 @@ from gi.repository import GLib
 import dbusmock
 from packaging.version import Version
 
-tracemalloc.start(25)
 dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
 
 have_bluetoothctl = shutil.which("bluetoothctl")
@@ -38,19 +36,53 @@ have_pbap_client = shutil.which("pbap-client")
 os_release = Path("/etc/os-release")
 el10 = os_release.exists() and "platform:el10" in os_release.read_text("UTF-8")
 
-
-def _run_bluetoothctl(command):
+# phone book entry for the obex transfers
+VCARD = (
+    b"BEGIN:VCARD\r\n"
+    b"VERSION:3.0\r\n"
+    b"FN:Forrest Gump\r\n"
+    b"TEL;TYPE=WORK,VOICE:(111) 555-1212\r\n"
+    b"TEL;TYPE=HOME,VOICE:(404) 555-1212\r\n"
+    b"EMAIL;TYPE=PREF,INTERNET:forrestgump@example.com\r\n"
+    b"EMAIL:test@example.com\r\n"
+    b"URL;TYPE=HOME:http://example.com/\r\n"
+    b"URL:http://forest.com/\r\n"
+    b"URL:https://test.com/\r\n"
+    b"END:VCARD\r\n"
+)
+
+# bluetoothctl output decoration: colour control codes, and the command prompt
+# (after removing the colour codes)
+ESCAPE_SEQ_RE = re.compile(r"\x1b\[[0-9;]*[mPK]")
+PROMPT_RE = re.compile(r"^\[bluetooth\]# ")
+
+
+def _run_bluetoothctl(dbus_con, command):
     """Run bluetoothctl with the given command.
 
+    dbus_con is the system bus connection on which the bluez5 mock runs.
+
     Return its output as a list of lines, with the command prompt removed
     from each, and empty lines eliminated.
 
     If bluetoothctl returns a non-zero exit code, raise an Exception.
     """
+    agent_manager = dbus.Interface(
+        dbus_con.get_object("org.bluez", "/org/bluez", introspect=False), dbusmock.MOCK_IFACE
+    )
+    n_agents = len(agent_manager.GetMethodCalls("RegisterAgent"))
+
     with subprocess.Popen(
         ["bluetoothctl"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True
     ) as process:
-        time.sleep(0.5)  # give it time to query the bus
+        # give it time to query the bus; it registers its agent once it got the
+        # objects, but don't wait more than a second for that
+        for _ in range(50):
+            if len(agent_manager.GetMethodCalls("RegisterAgent")) > n_agents:
+                # the mock got the call, give bluetoothctl some time to handle the reply
+                time.sleep(0.1)
+                break
+            time.sleep(0.02)
         out, err = process.communicate(input="list\n" + command + "\nquit\n")
 
         # Ignore output on stderr unless bluetoothctl dies.
@@ -66,28 +98,35 @@ def _run_bluetoothctl(command):
     # The prompt looks like `[bluetooth]# `, potentially containing command
     # line colour control codes.
     def remove_prefix(line):
-        line = re.sub(r"\x1b\[[0-9;]*[mPK]", "", line)
-        line = re.sub(r"^\[bluetooth\]# ", "", line)
+        line = ESCAPE_SEQ_RE.sub("", line)
+        line = PROMPT_RE.sub("", line)
         return line.strip()
 
-    lines = out.split("\n")
-    lines = map(remove_prefix, lines)
-    lines = filter(lambda line: line != "", lines)
+    lines = (remove_prefix(line) for line in out.split("\n"))
 
     # Filter out the echoed commands. (bluetoothctl uses readline.)
-    return list(filter(lambda line: line not in ["list", command, "quit"], lines))
+    echoed = {"list", command, "quit"}
+    return [line for line in lines if line and line not in echoed]
 
 
-def _introspect_property_types(obj, interface):
+def _introspect_property_types(obj):
+    """Return interface -> property name -> type signature map of obj"""
+
     dbus_introspect = dbus.Interface(obj, dbus.INTROSPECTABLE_IFACE)
     xml = dbus_introspect.Introspect()
     root = ET.fromstring(xml)
 
-    prop_types = {}
-    for prop in root.findall(f'./interface[@name="{interface}"]/property'):
-        name, type_sig = prop.attrib["name"], prop.attrib["type"]
-        prop_types[name] = type_sig
-    return prop_types
+    return {
+        iface.attrib["name"]: {prop.attrib["name"]: prop.attrib["type"] for prop in iface.findall("./property")}
+        for iface in root.findall("./interface")
+    }
+
+
+def _advertising_instances(props):
+    """Return (ActiveInstances, SupportedInstances) of an adapter's LEAdvertisingManager1"""
+
+    adv_manager_props = props.GetAll("org.bluez.LEAdvertisingManager1")
+    return adv_manager_props["ActiveInstances"], adv_manager_props["SupportedInstances"]
 
 
 @unittest.skipUnless(have_bluetoothctl, "bluetoothctl not installed")
@@ -98,9 +137,9 @@ class TestBlueZ5(dbusmock.DBusTestCase):
     def setUpClass(cls):
         cls.start_system_bus()
         cls.dbus_con = cls.get_dbus(True)
-        (cls.p_mock, cls.obj_bluez) = cls.spawn_server_template("bluez5", {}, stdout=subprocess.PIPE)
+        (cls.p_mock, cls.obj_bluez) = cls.spawn_server_template("bluez5", {}, stdout=subprocess.DEVNULL)
 
-        out = _run_bluetoothctl("version")
+        out = _run_bluetoothctl(cls.dbus_con, "version")
         version = next(line.split(" ")[-1] for line in out if line.startswith("Version"))
         cls.bluez5_version = Version(version)
 
@@ -111,7 +150,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
 
     def test_no_adapters(self):
         # Check for adapters.
-        out = _run_bluetoothctl("list")
+        out = _run_bluetoothctl(self.dbus_con, "list")
         for line in out:
             self.assertFalse(line.startswith("Controller "))
 
@@ -125,14 +164,14 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         self.assertEqual(path, "/org/bluez/" + adapter_name)
 
         adapter = self.dbus_con.get_object("org.bluez", path)
-        address = adapter.Get("org.bluez.Adapter1", "Address")
-        address_type = adapter.Get("org.bluez.Adapter1", "AddressType")
+        adapter_props = adapter.GetAll("org.bluez.Adapter1")
+        address = adapter_props["Address"]
+        address_type = adapter_props["AddressType"]
 
-        # Check for the adapter.
-        out = _run_bluetoothctl("list")
+        # Check for the adapter; _run_bluetoothctl() always lists the controllers first
+        out = _run_bluetoothctl(self.dbus_con, "show " + address)
         self.assertIn("Controller " + address + " " + system_name + " [default]", out)
 
-        out = _run_bluetoothctl("show " + address)
         if address_type is not None:
             self.assertIn(f"Controller {address} ({address_type})", out)
         else:
@@ -190,10 +229,10 @@ class TestBlueZ5(dbusmock.DBusTestCase):
 
         # Test that the property types on the interfaces are defined correctly
         adapter = self.dbus_con.get_object("org.bluez", path)
+        prop_types = _introspect_property_types(adapter)
 
-        adapter_prop_types = _introspect_property_types(adapter, "org.bluez.Adapter1")
         self.assertEqual(
-            adapter_prop_types,
+            prop_types["org.bluez.Adapter1"],
             {
                 "Address": "s",
                 "AddressType": "s",
@@ -212,9 +251,8 @@ class TestBlueZ5(dbusmock.DBusTestCase):
             },
         )
 
-        adv_manager_prop_types = _introspect_property_types(adapter, "org.bluez.LEAdvertisingManager1")
         self.assertEqual(
-            adv_manager_prop_types,
+            prop_types["org.bluez.LEAdvertisingManager1"],
             {
                 "ActiveInstances": "y",
                 "SupportedCapabilities": "a{sv}",
@@ -225,9 +263,8 @@ class TestBlueZ5(dbusmock.DBusTestCase):
             },
         )
 
-        adv_monitor_manager_prop_types = _introspect_property_types(adapter, "org.bluez.AdvertisementMonitorManager1")
         self.assertEqual(
-            adv_monitor_manager_prop_types,
+            prop_types["org.bluez.AdvertisementMonitorManager1"],
             {
                 "SupportedMonitorTypes": "as",
             },
@@ -240,7 +277,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         self.assertEqual(path, "/org/bluez/" + adapter_name)
 
         # Check for devices.
-        out = _run_bluetoothctl("devices")
+        out = _run_bluetoothctl(self.dbus_con, "devices")
         self.assertIn("Controller 00:01:02:03:04:05 my-computer [default]", out)
 
     def test_one_device(self):
@@ -257,11 +294,11 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         self.assertEqual(path, "/org/bluez/" + adapter_name + "/dev_" + address.replace(":", "_"))
 
         # Check for the device.
-        out = _run_bluetoothctl("devices")
+        out = _run_bluetoothctl(self.dbus_con, "devices")
         self.assertIn("Device " + address + " " + alias, out)
 
         # Check the device's properties.
-        out = "\n".join(_run_bluetoothctl("info " + address))
+        out = "\n".join(_run_bluetoothctl(self.dbus_con, "info " + address))
         self.assertIn("Device " + address, out)
         self.assertIn("Name: " + alias, out)
         self.assertIn("Alias: " + alias, out)
@@ -287,7 +324,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         self.dbusmock_bluez.PairDevice(adapter_name, address)
 
         # Check the device's properties.
-        out = "\n".join(_run_bluetoothctl("info " + address))
+        out = "\n".join(_run_bluetoothctl(self.dbus_con, "info " + address))
         self.assertIn("Device " + address, out)
         self.assertIn("Paired: yes", out)
 
@@ -297,7 +334,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         # Then the path is returned
         self.assertEqual(adv_path, "/org/dbusmock/bluez/advertisement/bc001")
         # And the object is exported on the bus
-        adv = self.dbus_con.get_object("org.bluez", adv_path)
+        adv = self.dbus_con.get_object("org.bluez", adv_path, introspect=False)
         adv_type = adv.Get("org.bluez.LEAdvertisement1", "Type", dbus_interface=dbus.PROPERTIES_IFACE)
         # And has the correct properties
         self.assertEqual(adv_type, "broadcast")
@@ -308,8 +345,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         adapter = self.dbus_con.get_object("org.bluez", path)
         adv_manager = dbus.Interface(adapter, "org.bluez.LEAdvertisingManager1")
         props = dbus.Interface(adapter, dbus.PROPERTIES_IFACE)
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
+        active_instances, supported_instances = _advertising_instances(props)
 
         # And no active instances
         self.assertEqual(active_instances, 0)
@@ -319,11 +355,10 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         # Then no error is raised
         adv_manager.RegisterAdvertisement("/adv0", {})
 
+        active_instances, supported_instances = _advertising_instances(props)
         # And active instances is incremented
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
         self.assertEqual(active_instances, 1)
         # And supported instances is decremented
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
         self.assertEqual(supported_instances, 4)
 
     def test_register_advertisement_duplicate(self):
@@ -341,11 +376,10 @@ class TestBlueZ5(dbusmock.DBusTestCase):
             adv_manager.RegisterAdvertisement("/adv0", {})
         self.assertEqual(ctx.exception.get_dbus_name(), "org.bluez.Error.AlreadyExists")
 
+        active_instances, supported_instances = _advertising_instances(props)
         # And active instances is not incremented
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
         self.assertEqual(active_instances, 1)
         # And supported instances is not decremented
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
         self.assertEqual(supported_instances, 4)
 
     def test_register_advertisement_max_instances(self):
@@ -365,11 +399,10 @@ class TestBlueZ5(dbusmock.DBusTestCase):
             adv_manager.RegisterAdvertisement(f"/adv{int(max_instances)}", {})
         self.assertEqual(ctx.exception.get_dbus_name(), "org.bluez.Error.NotPermitted")
 
+        active_instances, supported_instances = _advertising_instances(props)
         # And active instances is equal to the number of supported instances
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
         self.assertEqual(active_instances, max_instances)
         # And supported instances is now zero
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
         self.assertEqual(supported_instances, 0)
 
     def test_unregister_advertisement(self):
@@ -381,19 +414,17 @@ class TestBlueZ5(dbusmock.DBusTestCase):
 
         # And a registered advertisement
         adv_manager.RegisterAdvertisement("/adv0", {})
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
+        active_instances, supported_instances = _advertising_instances(props)
         self.assertEqual(active_instances, 1)
         self.assertEqual(supported_instances, 4)
 
         # When the advertisement is unregistered
         # Then no error is raised
         adv_manager.UnregisterAdvertisement("/adv0")
+        active_instances, supported_instances = _advertising_instances(props)
         # And active instances is decremented
-        active_instances = props.Get(adv_manager.dbus_interface, "ActiveInstances")
         self.assertEqual(active_instances, 0)
         # And supported instances is incremented
-        supported_instances = props.Get(adv_manager.dbus_interface, "SupportedInstances")
         self.assertEqual(supported_instances, 5)
 
     def test_unregister_advertisement_unknown(self):
@@ -414,7 +445,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         # Then the path is returned
         self.assertEqual(adv_path, "/org/dbusmock/bluez/monitor/mon001")
         # And the object is exported on the bus
-        adv = self.dbus_con.get_object("org.bluez", adv_path)
+        adv = self.dbus_con.get_object("org.bluez", adv_path, introspect=False)
         adv_type = adv.Get("org.bluez.AdvertisementMonitor1", "Type", dbus_interface=dbus.PROPERTIES_IFACE)
         # And has the correct properties
         self.assertEqual(adv_type, "or_patterns")
@@ -474,7 +505,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         adapter = self.dbus_con.get_object("org.bluez", path)
 
         # When an advertisement is started via bluetoothctl
-        _run_bluetoothctl("advertise broadcast")
+        _run_bluetoothctl(self.dbus_con, "advertise broadcast")
 
         # Then the RegisterAdvertisement method was called
         mock_calls = adapter.GetMethodCalls("RegisterAdvertisement", dbus_interface="org.freedesktop.DBus.Mock")
@@ -488,7 +519,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         adapter = self.dbus_con.get_object("org.bluez", path)
 
         # When an advertisement monitor is configured via bluetoothctl
-        out = _run_bluetoothctl("monitor.add-or-pattern 0 255 01")
+        out = _run_bluetoothctl(self.dbus_con, "monitor.add-or-pattern 0 255 01")
 
         # Then bluetoothctl reports success
         self.assertIn("Advertisement Monitor 0 added", out)
@@ -554,7 +585,7 @@ class TestBlueZ5(dbusmock.DBusTestCase):
         bluez = self.dbus_con.get_object("org.bluez", "/org/bluez")
 
         # When bluetoothctl is started
-        out = _run_bluetoothctl("list")
+        out = _run_bluetoothctl(self.dbus_con, "list")
 
         # Then it reports that the agent was registered
         if self.bluez5_version >= Version("5.57"):
@@ -580,20 +611,18 @@ class TestBlueZObex(dbusmock.DBusTestCase):
 
     def setUp(self):
         # bluetoothd
-        (self.p_mock, self.obj_bluez) = self.spawn_server_template("bluez5", {}, stdout=subprocess.PIPE)
+        (self.p_mock, self.obj_bluez) = self.spawn_server_template("bluez5", {}, stdout=subprocess.DEVNULL)
         self.dbusmock_bluez = dbus.Interface(self.obj_bluez, "org.bluez.Mock")
 
         # obexd
-        (self.p_mock_obex, self.obj_obex) = self.spawn_server_template("bluez5-obex", {}, stdout=subprocess.PIPE)
+        (self.p_mock_obex, self.obj_obex) = self.spawn_server_template("bluez5-obex", {}, stdout=subprocess.DEVNULL)
         self.dbusmock = dbus.Interface(self.obj_obex, dbusmock.MOCK_IFACE)
         self.dbusmock_obex = dbus.Interface(self.obj_obex, "org.bluez.obex.Mock")
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 
-        self.p_mock_obex.stdout.close()
         self.p_mock_obex.terminate()
         self.p_mock_obex.wait()
 
@@ -613,38 +642,42 @@ class TestBlueZObex(dbusmock.DBusTestCase):
 
         def _transfer_created_cb(path, params, transfer_filename):
             bus = self.get_dbus(False)
-            obj = bus.get_object("org.bluez.obex", path)
+            obj = bus.get_object("org.bluez.obex", path, introspect=False)
             transfer = dbus.Interface(obj, "org.bluez.obex.transfer1.Mock")
 
-            Path(transfer_filename).write_bytes(
-                b"BEGIN:VCARD\r\n"
-                b"VERSION:3.0\r\n"
-                b"FN:Forrest Gump\r\n"
-                b"TEL;TYPE=WORK,VOICE:(111) 555-1212\r\n"
-                b"TEL;TYPE=HOME,VOICE:(404) 555-1212\r\n"
-                b"EMAIL;TYPE=PREF,INTERNET:forrestgump@example.com\r\n"
-                b"EMAIL:test@example.com\r\n"
-                b"URL;TYPE=HOME:http://example.com/\r\n"
-                b"URL:http://forest.com/\r\n"
-                b"URL:https://test.com/\r\n"
-                b"END:VCARD\r\n"
-            )
+            Path(transfer_filename).write_bytes(VCARD)
 
             transfer.UpdateStatus(True)
             transferred_files.append(transfer_filename)
 
         self.dbusmock_obex.connect_to_signal("TransferCreated", _transfer_created_cb)
 
-        # Run pbap-client, then run the GLib main loop. The main loop will quit
-        # after a timeout, at which point the code handles output from
-        # pbap-client and waits for it to terminate. Integrating
-        # process.communicate() with the GLib main loop to avoid the timeout is
-        # too difficult.
+        def on_hup(*_):
+            nonlocal hup_id
+
+            hup_id = 0
+            ml.quit()
+            return False
+
+        def on_timeout():
+            nonlocal timeout_id
+
+            timeout_id = 0
+            ml.quit()
+            return False
+
+        # Run pbap-client, then run the GLib main loop to serve the transfers
+        # until pbap-client exits (and thus closes its stdout), but at most 5 s.
+        # Then handle the output from pbap-client and wait for it to terminate.
         with subprocess.Popen(
             ["pbap-client", device_address], stdout=subprocess.PIPE, stderr=sys.stderr, universal_newlines=True
         ) as process:
-            GLib.timeout_add(5000, ml.quit)
+            hup_id = GLib.io_add_watch(process.stdout.fileno(), GLib.PRIORITY_DEFAULT, GLib.IOCondition.HUP, on_hup)
+            timeout_id = GLib.timeout_add(5000, on_timeout)
             ml.run()
+            for source_id in (hup_id, timeout_id):
+                if source_id:
+                    GLib.source_remove(source_id)
 
             out = process.communicate()[0]
 
@@ -15,7 +15,6 @@ import shutil
 import subprocess
 import sys
 import tempfile
-import tracemalloc
 import unittest
 from pathlib import Path
 
@@ -23,7 +22,6 @@ import dbus
 
 import dbusmock
 
-tracemalloc.start(25)
 have_upower = shutil.which("upower")
 have_gdbus = shutil.which("gdbus")
 
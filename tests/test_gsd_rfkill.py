@@ -7,8 +7,6 @@
 __author__ = "Guido Günther"
 __copyright__ = "2024 The Phosh Developers"
 
-import fcntl
-import os
 import subprocess
 import sys
 import unittest
@@ -27,13 +25,9 @@ class TestGsdRfkill(dbusmock.DBusTestCase):
         cls.dbus_con = cls.get_dbus()
 
     def setUp(self):
-        (self.p_mock, self.p_obj) = self.spawn_server_template("gsd_rfkill", {}, stdout=subprocess.PIPE)
-        # set log to nonblocking
-        flags = fcntl.fcntl(self.p_mock.stdout, fcntl.F_GETFL)
-        fcntl.fcntl(self.p_mock.stdout, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        (self.p_mock, self.p_obj) = self.spawn_server_template("gsd_rfkill", {}, stdout=subprocess.DEVNULL)
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 
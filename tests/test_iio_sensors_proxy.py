@@ -42,11 +42,10 @@ class TestIIOSensorsProxyBase(dbusmock.DBusTestCase):
 
     def setUp(self):
         super().setUp()
-        (self.p_mock, self.p_obj) = self.spawn_server_template("iio-sensors-proxy", {}, stdout=subprocess.PIPE)
+        (self.p_mock, self.p_obj) = self.spawn_server_template("iio-sensors-proxy", {}, stdout=subprocess.DEVNULL)
 
     def tearDown(self):
         if self.p_mock:
-            self.p_mock.stdout.close()
             self.p_mock.terminate()
             self.p_mock.wait()
 
@@ -14,7 +14,6 @@ import re
 import shutil
 import subprocess
 import sys
-import tracemalloc
 import unittest
 from pathlib import Path
 
@@ -22,7 +21,6 @@ import dbus
 
 import dbusmock
 
-tracemalloc.start(25)
 have_loginctl = shutil.which("loginctl")
 
 
@@ -45,12 +43,11 @@ class TestLogind(dbusmock.DBusTestCase):
 
     def tearDown(self):
         if self.p_mock:
-            self.p_mock.stdout.close()
             self.p_mock.terminate()
             self.p_mock.wait()
 
     def test_empty(self):
-        (self.p_mock, _) = self.spawn_server_template("logind", {}, stdout=subprocess.PIPE)
+        (self.p_mock, _) = self.spawn_server_template("logind", {}, stdout=subprocess.DEVNULL)
         cmd = ["loginctl"]
         if self.version >= "209":
             cmd.append("--no-legend")
@@ -64,7 +61,7 @@ class TestLogind(dbusmock.DBusTestCase):
         self.assertEqual(out, "")
 
     def test_session(self):
-        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.PIPE)
+        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.DEVNULL)
 
         obj_logind.AddSession("c1", "seat0", 500, "joe", True)
 
@@ -112,13 +109,13 @@ class TestLogind(dbusmock.DBusTestCase):
         self.assertRegex(out, "LockedHint=yes")
 
     def test_properties(self):
-        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.PIPE)
+        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.DEVNULL)
         props = obj_logind.GetAll("org.freedesktop.login1.Manager", interface=dbus.PROPERTIES_IFACE)
         self.assertEqual(props["PreparingForSleep"], False)
         self.assertEqual(props["IdleSinceHint"], 0)
 
     def test_inhibit(self):
-        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.PIPE)
+        (self.p_mock, obj_logind) = self.spawn_server_template("logind", {}, stdout=subprocess.DEVNULL)
 
         # what, who, why, mode
         fd = obj_logind.Inhibit("suspend", "testcode", "purpose", "delay")
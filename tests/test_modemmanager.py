@@ -41,11 +41,10 @@ class TestModemManagerBase(dbusmock.DBusTestCase):
 
     def setUp(self):
         super().setUp()
-        (self.p_mock, self.p_obj) = self.spawn_server_template("modemmanager", {}, stdout=subprocess.PIPE)
+        (self.p_mock, self.p_obj) = self.spawn_server_template("modemmanager", {}, stdout=subprocess.DEVNULL)
 
     def tearDown(self):
         if self.p_mock:
-            self.p_mock.stdout.close()
             self.p_mock.terminate()
             self.p_mock.wait()
 
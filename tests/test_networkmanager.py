@@ -15,7 +15,6 @@ import re
 import shutil
 import subprocess
 import sys
-import tracemalloc
 import unittest
 
 import dbus
@@ -37,7 +36,6 @@ from dbusmock.templates.networkmanager import (
 )
 from packaging.version import Version
 
-tracemalloc.start(25)
 dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
 
 have_nmcli = shutil.which("nmcli")
@@ -68,13 +66,12 @@ class TestNetworkManager(dbusmock.DBusTestCase):
 
     def setUp(self):
         (self.p_mock, self.obj_networkmanager) = self.spawn_server_template(
-            "networkmanager", {"NetworkingEnabled": True, "WwanEnabled": False}, stdout=subprocess.PIPE
+            "networkmanager", {"NetworkingEnabled": True, "WwanEnabled": False}, stdout=subprocess.DEVNULL
         )
         self.dbusmock = dbus.Interface(self.obj_networkmanager, dbusmock.MOCK_IFACE)
         self.settings = dbus.Interface(self.dbus_con.get_object(MANAGER_IFACE, SETTINGS_OBJ), SETTINGS_IFACE)
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 
@@ -34,11 +34,10 @@ class TestPolkit(dbusmock.DBusTestCase):
         cls.dbus_con = cls.get_dbus(True)
 
     def setUp(self):
-        (self.p_mock, self.obj_polkitd) = self.spawn_server_template("polkitd", {}, stdout=subprocess.PIPE)
+        (self.p_mock, self.obj_polkitd) = self.spawn_server_template("polkitd", {}, stdout=subprocess.DEVNULL)
         self.dbusmock = dbus.Interface(self.obj_polkitd, dbusmock.MOCK_IFACE)
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 
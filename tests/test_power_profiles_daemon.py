@@ -10,8 +10,6 @@ __copyright__ = """
 (c) 2017 - 2022 Martin Pitt <martin@piware.de>
 """
 
-import fcntl
-import os
 import re
 import shutil
 import subprocess
@@ -50,14 +48,10 @@ class TestPowerProfilesDaemon(dbusmock.DBusTestCase):
             print("Failed to get powerprofilesctl version, assuming >= 0.20:", e, file=sys.stderr)
             template = "upower_power_profiles_daemon"
 
-        (self.p_mock, self.obj_ppd) = self.spawn_server_template(template, {}, stdout=subprocess.PIPE)
-        # set log to nonblocking
-        flags = fcntl.fcntl(self.p_mock.stdout, fcntl.F_GETFL)
-        fcntl.fcntl(self.p_mock.stdout, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        (self.p_mock, self.obj_ppd) = self.spawn_server_template(template, {}, stdout=subprocess.DEVNULL)
         self.dbusmock = dbus.Interface(self.obj_ppd, dbusmock.MOCK_IFACE)
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 
@@ -38,7 +38,6 @@ class TestSystemd(dbusmock.DBusTestCase):
 
     def tearDown(self):
         if self.p_mock:
-            self.p_mock.stdout.close()
             self.p_mock.terminate()
             self.p_mock.wait()
 
@@ -49,7 +48,9 @@ class TestSystemd(dbusmock.DBusTestCase):
     def _test_base(self, bus, system_bus=True):
         dummy_service = "dummy-dbusmock.service"
 
-        (self.p_mock, obj_systemd) = self.spawn_server_template("systemd", {}, subprocess.PIPE, system_bus=system_bus)
+        (self.p_mock, obj_systemd) = self.spawn_server_template(
+            "systemd", {}, subprocess.DEVNULL, system_bus=system_bus
+        )
 
         systemd_mock = dbus.Interface(obj_systemd, dbusmock.MOCK_IFACE)
         systemd_mock.AddMockUnit(dummy_service)
@@ -92,7 +93,6 @@ class TestSystemd(dbusmock.DBusTestCase):
         wait_for_job(job_path)
         self._assert_unit_property(unit_obj, "ActiveState", "inactive")
 
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
         self.p_mock = None
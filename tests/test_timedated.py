@@ -35,12 +35,11 @@ class TestTimedated(dbusmock.DBusTestCase):
         cls.dbus_con = cls.get_dbus(True)
 
     def setUp(self):
-        (self.p_mock, _) = self.spawn_server_template("timedated", {}, stdout=subprocess.PIPE)
+        (self.p_mock, _) = self.spawn_server_template("timedated", {}, stdout=subprocess.DEVNULL)
         self.obj_timedated = self.dbus_con.get_object("org.freedesktop.timedate1", "/org/freedesktop/timedate1")
 
     def tearDown(self):
         if self.p_mock:
-            self.p_mock.stdout.close()
             self.p_mock.terminate()
             self.p_mock.wait()
 
@@ -16,7 +16,6 @@ import shutil
 import subprocess
 import sys
 import time
-import tracemalloc
 import unittest
 
 import dbus
@@ -26,7 +25,6 @@ import dbusmock
 UP_DEVICE_LEVEL_UNKNOWN = 0
 UP_DEVICE_LEVEL_NONE = 1
 
-tracemalloc.start(25)
 have_upower = shutil.which("upower")
 
 
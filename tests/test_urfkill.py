@@ -10,8 +10,6 @@ __copyright__ = """
 (c) 2017 - 2022 Martin Pitt <martin@piware.de>
 """
 
-import fcntl
-import os
 import subprocess
 import sys
 import unittest
@@ -37,14 +35,10 @@ class TestURfkill(dbusmock.DBusTestCase):
         cls.dbus_con = cls.get_dbus(True)
 
     def setUp(self):
-        (self.p_mock, self.obj_urfkill) = self.spawn_server_template("urfkill", {}, stdout=subprocess.PIPE)
-        # set log to nonblocking
-        flags = fcntl.fcntl(self.p_mock.stdout, fcntl.F_GETFL)
-        fcntl.fcntl(self.p_mock.stdout, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        (self.p_mock, self.obj_urfkill) = self.spawn_server_template("urfkill", {}, stdout=subprocess.DEVNULL)
         self.dbusmock = dbus.Interface(self.obj_urfkill, dbusmock.MOCK_IFACE)
 
     def tearDown(self):
-        self.p_mock.stdout.close()
         self.p_mock.terminate()
         self.p_mock.wait()
 